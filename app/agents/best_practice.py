@@ -19,23 +19,13 @@ class BestPracticeAgent:
         risk_profile = state.risk_profile
         
         # Convert to dict format for rules engine
-        customer_dict = {
-            "name": customer.name,
-            "zip_code": customer.zip_code,
-            "net_worth": customer.net_worth,
-            "home_value": customer.home_value,
-            "additional_properties": customer.additional_properties,
-            "has_watercraft": customer.has_watercraft,
-            "has_high_value_items": customer.has_high_value_items,
-        }
+        customer_dict = customer.model_dump(include={
+            "name", "zip_code", "net_worth", "home_value",
+            "additional_properties", "has_watercraft", "has_high_value_items",
+        })
         
         coverages_dict = [
-            {
-                "coverage_type": cov.coverage_type.value,
-                "limit": cov.limit,
-                "deductible": cov.deductible,
-                "premium": cov.premium
-            }
+            cov.model_dump(mode="json", include={"coverage_type", "limit", "deductible", "premium"})
             for cov in existing_coverages
         ]
         
@@ -1,6 +1,6 @@
 """Orchestrator Agent - Coordinates the multi-agent workflow using LangGraph."""
-from typing import Dict, Any
-from langgraph.graph import StateGraph, END
+from typing import Dict, Any, Iterator, Union
+from langgraph.graph import StateGraph, START, END
 from app.core.models import AgentState, AnalysisResult, PolicyInput
 from app.agents.policy_analyzer import PolicyAnalyzerAgent
 from app.agents.risk_context import RiskContextAgent
@@ -35,11 +35,13 @@ class Orchestrator:
         workflow.add_node("gap_reasoning", self._gap_reasoning_node)
         workflow.add_node("finalize", self._finalize_node)
         
-        # Define the workflow edges
-        workflow.set_entry_point("policy_analysis")
-        workflow.add_edge("policy_analysis", "risk_assessment")
+        # Define the workflow edges. Policy analysis is independent of the
+        # risk -> best practices chain, so both branches start together and
+        # gap reasoning waits for them to join.
+        workflow.add_edge(START, "policy_analysis")
+        workflow.add_edge(START, "risk_assessment")
         workflow.add_edge("risk_assessment", "best_practices")
-        workflow.add_edge("best_practices", "gap_reasoning")
+        workflow.add_edge(["policy_analysis", "best_practices"], "gap_reasoning")
         workflow.add_edge("gap_reasoning", "finalize")
         workflow.add_edge("finalize", END)
         
@@ -114,3 +116,18 @@ class Orchestrator:
         logger.info("Coverage gap analysis completed successfully")
         
         return final_state["analysis_result"]
+    
+    def analyze_policy_stream(self, policy_input: PolicyInput) -> Iterator[Union[str, AnalysisResult]]:
+        """Run the workflow, yielding each node name as it finishes and the final result last."""
+        logger.info(f"Starting streamed coverage gap analysis for policy {policy_input.policy_number}")
+        
+        # Initialize state
+        initial_state = AgentState(policy_input=policy_input)
+        
+        # Report progress as each agent node completes
+        for update in self.workflow.stream(initial_state, stream_mode="updates"):
+            for node_name, node_output in update.items():
+                yield node_name
+                if node_output and node_output.get("analysis_result") is not None:
+                    logger.info("Coverage gap analysis completed successfully")
+                    yield node_output["analysis_result"]
@@ -12,7 +12,16 @@ def parse_json_policy(file_content: str) -> PolicyInput:
     """Parse JSON policy data into PolicyInput model."""
     try:
         data = json.loads(file_content)
-        
+    except Exception as e:
+        logger.error(f"Error parsing JSON policy: {e}")
+        raise ValueError(f"Invalid policy JSON format: {e}")
+    
+    return parse_policy_data(data)
+
+
+def parse_policy_data(data: Dict[str, Any]) -> PolicyInput:
+    """Parse already-decoded policy data into PolicyInput model."""
+    try:
         # Parse customer profile
         customer_data = data.get("customer_profile", {})
         customer_profile = CustomerProfile(**customer_data)
@@ -24,8 +33,7 @@ def parse_json_policy(file_content: str) -> PolicyInput:
             # Ensure coverage_type is a valid enum
             cov_type_str = cov_data.get("coverage_type", "").lower()
             if cov_type_str in [e.value for e in CoverageType]:
-                cov_data["coverage_type"] = cov_type_str
-                existing_coverages.append(Coverage(**cov_data))
+                existing_coverages.append(Coverage(**{**cov_data, "coverage_type": cov_type_str}))
         
         policy_input = PolicyInput(
             policy_number=data.get("policy_number", "UNKNOWN"),
@@ -41,8 +49,12 @@ def parse_json_policy(file_content: str) -> PolicyInput:
         raise ValueError(f"Invalid policy JSON format: {e}")
 
 
-def parse_policy_file(file_path: str = None, file_content: str = None) -> PolicyInput:
-    """Parse policy file (JSON or PDF) and return PolicyInput."""
+def parse_policy_file(file_path: str = None, file_content: str = None,
+                      data: Dict[str, Any] = None) -> PolicyInput:
+    """Parse policy file (JSON or PDF) or pre-parsed policy data and return PolicyInput."""
+    if data is not None:
+        return parse_policy_data(data)
+    
     if file_content:
         # Assume JSON if content is provided directly
         return parse_json_policy(file_content)
@@ -58,4 +70,4 @@ def parse_policy_file(file_path: str = None, file_content: str = None) -> Policy
         else:
             raise ValueError(f"Unsupported file format: {path.suffix}")
     
-    raise ValueError("Either file_path or file_content must be provided")
+    raise ValueError("One of file_path, file_content or data must be provided")
@@ -4,14 +4,17 @@ This version runs directly on Streamlit Cloud without needing a separate FastAPI
 All agent logic is integrated directly into the Streamlit app.
 """
 import streamlit as st
-import json
+import orjson
+import hashlib
+import html
 import os
+import string
+from collections import Counter
 from pathlib import Path
 
-# Import agent components
-from app.agents.orchestrator import Orchestrator
-from app.utils.policy_parser import parse_policy_file
-from app.core.models import RiskSeverity
+# Agent components are imported lazily so the landing page renders
+# without loading the LLM stack
+from app.core.models import CoverageGap, RiskSeverity
 
 # Page configuration
 st.set_page_config(
@@ -21,9 +24,16 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Bundled sample policies, resolved relative to this file
+_SAMPLE_DIR = Path(__file__).resolve().parent / "app" / "data" / "sample_policies"
+SAMPLE_POLICIES = {
+    "High Net Worth (Miami)": _SAMPLE_DIR / "high_networth_miami.json",
+    "San Francisco Home": _SAMPLE_DIR / "san_francisco_home.json",
+    "Well Covered (Chicago)": _SAMPLE_DIR / "well_covered_chicago.json",
+}
+
 # Custom CSS for better styling
-st.markdown("""
-<style>
+_CSS = """
     .main-header {
         font-size: 2.5rem;
         font-weight: 700;
@@ -72,6 +82,12 @@ st.markdown("""
         background-color: #17a2b8;
         color: white;
     }
+    .metric-grid {
+        display: grid;
+        grid-template-columns: repeat(3, 1fr);
+        gap: 1rem;
+        margin-bottom: 1rem;
+    }
     .metric-card {
         background-color: #f8f9fa;
         padding: 1rem;
@@ -88,19 +104,131 @@ st.markdown("""
         color: #666;
         text-transform: uppercase;
     }
-</style>
-""", unsafe_allow_html=True)
+"""
+
+
+_METRICS_TEMPLATE = string.Template("""<div class="metric-grid">
+    <div class="metric-card">
+        <div class="metric-value">$total_gaps</div>
+        <div class="metric-label">Coverage Gaps</div>
+    </div>
+    <div class="metric-card">
+        <div class="metric-value">$high_priority</div>
+        <div class="metric-label">High Priority</div>
+    </div>
+    <div class="metric-card">
+        <div class="metric-value">$$$premium_impact</div>
+        <div class="metric-label">Annual Premium Impact</div>
+    </div>
+</div>
+""")
+
+# Progress labels for workflow nodes, matching the agents listed in the sidebar
+_AGENT_LABELS = {
+    "policy_analysis": "📊 Policy Analyzer",
+    "risk_assessment": "⚠️ Risk Assessor",
+    "best_practices": "✅ Best Practice Checker",
+    "gap_reasoning": "🎯 Gap Reasoner",
+}
+
+# (badge class, card class) per severity level
+_SEVERITY_CLASSES = {
+    RiskSeverity.HIGH: ("severity-high", "gap-high"),
+    RiskSeverity.MEDIUM: ("severity-medium", "gap-medium"),
+    RiskSeverity.LOW: ("severity-low", "gap-low"),
+}
+
+# Gap card markup; the optional lines fill $premium and $risk_factors
+_GAP_CARD_TEMPLATE = string.Template("""<div class="gap-card $gap_class">
+    <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;">
+        <h3 style="margin: 0;">$title</h3>
+        <span class="severity-badge $severity_class">$severity Risk</span>
+    </div>
+    <p><strong>Why this matters:</strong> $explanation</p>
+    <p><strong>Recommendation:</strong> $recommendation</p>$premium$risk_factors
+</div>
+""")
+_PREMIUM_TEMPLATE = string.Template(
+    "\n    <p><strong>Estimated Premium:</strong> $$$premium/year</p>"
+)
+_RISK_FACTORS_TEMPLATE = string.Template(
+    "\n    <p><strong>Risk Factors:</strong> $risk_factors</p>"
+)
+
+
+def _render_gap_card(gap: CoverageGap) -> str:
+    """Render a single coverage gap as an HTML card, escaping generated text."""
+    severity_class, gap_class = _SEVERITY_CLASSES[gap.severity]
+    premium = ""
+    if gap.estimated_annual_premium:
+        premium = _PREMIUM_TEMPLATE.substitute(premium=f"{gap.estimated_annual_premium:,.2f}")
+    risk_factors = ""
+    if gap.risk_factors:
+        risk_factors = _RISK_FACTORS_TEMPLATE.substitute(
+            risk_factors=html.escape(", ".join(gap.risk_factors))
+        )
+    return _GAP_CARD_TEMPLATE.substitute(
+        gap_class=gap_class,
+        severity_class=severity_class,
+        severity=gap.severity.value,
+        title=html.escape(gap.title),
+        explanation=html.escape(gap.explanation),
+        recommendation=html.escape(gap.recommendation),
+        premium=premium,
+        risk_factors=risk_factors,
+    )
+
+
+def _start_analysis():
+    """Mark an analysis as in flight; runs before the rerun triggered by the click."""
+    st.session_state['analyzing'] = True
+
+
+def _inject_css():
+    """Inject the app's custom CSS."""
+    st.markdown(f"<style>{_CSS}</style>", unsafe_allow_html=True)
 
 
 @st.cache_resource
 def get_orchestrator():
     """Create and cache the orchestrator instance."""
+    from app.agents.orchestrator import Orchestrator
     return Orchestrator()
 
 
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _analysis_cache_entry(policy_digest: str) -> dict:
+    """Shared slot for the analysis of one policy digest, expiring after an hour.
+    
+    The analysis itself streams UI updates, which st.cache_data cannot replay,
+    so the result is stored into this slot once the run finishes.
+    """
+    return {}
+
+
+@st.cache_data(persist="disk", show_spinner=False)
+def _load_sample(path: str, mtime_ns: int) -> str:
+    """Read and cache a sample policy file; mtime_ns invalidates the entry on change."""
+    return Path(path).read_text()
+
+
+@st.cache_data(show_spinner=False)
+def _decode_upload(file_bytes: bytes) -> str:
+    """Decode and cache an uploaded policy file."""
+    return file_bytes.decode('utf-8')
+
+
+@st.cache_data(show_spinner=False)
+def _parse_policy_json(raw: str):
+    """Parse and cache policy JSON for the preview and analysis."""
+    return orjson.loads(raw)
+
+
 def main():
     """Main Streamlit application."""
     
+    _inject_css()
+    
     # Header
     st.markdown('<div class="main-header">🛡️ Coverage Gap Detection</div>', unsafe_allow_html=True)
     st.markdown('<div class="sub-header">AI-Powered P&C Insurance Analysis</div>', unsafe_allow_html=True)
@@ -124,15 +252,9 @@ def main():
         """)
         
         st.header("📁 Sample Policies")
-        sample_policies = {
-            "High Net Worth (Miami)": "app/data/sample_policies/high_networth_miami.json",
-            "San Francisco Home": "app/data/sample_policies/san_francisco_home.json",
-            "Well Covered (Chicago)": "app/data/sample_policies/well_covered_chicago.json"
-        }
-        
         selected_sample = st.selectbox(
             "Load sample policy:",
-            ["None"] + list(sample_policies.keys())
+            ["None"] + list(SAMPLE_POLICIES.keys())
         )
     
     # Main content
@@ -142,6 +264,7 @@ def main():
         st.subheader("📤 Upload Policy Data")
         
         policy_data = None
+        policy_dict = None
         
         # File upload
         uploaded_file = st.file_uploader(
@@ -151,138 +274,133 @@ def main():
         )
         
         if uploaded_file:
-            policy_data = uploaded_file.read().decode('utf-8')
+            policy_data = _decode_upload(uploaded_file.getvalue())
             st.success("✅ Policy file loaded")
         
         # Load sample policy
         elif selected_sample != "None":
-            sample_path = Path(sample_policies[selected_sample])
-            if sample_path.exists():
-                policy_data = sample_path.read_text()
+            sample_path = SAMPLE_POLICIES[selected_sample]
+            try:
+                policy_data = _load_sample(str(sample_path), sample_path.stat().st_mtime_ns)
                 st.success(f"✅ Loaded sample: {selected_sample}")
+            except FileNotFoundError:
+                pass
         
-        # Show policy preview
+        # Validate once; the parsed dict feeds both the preview and the analysis
         if policy_data:
+            try:
+                policy_dict = _parse_policy_json(policy_data)
+            except orjson.JSONDecodeError as e:
+                st.error(f"❌ Invalid policy JSON: {e}")
+        
+        # Show policy preview
+        if policy_dict is not None:
             with st.expander("📄 View Policy Data"):
-                policy_json = json.loads(policy_data)
-                st.json(policy_json)
+                st.json(policy_dict)
     
     with col2:
         st.subheader("🚀 Analysis")
         
-        if policy_data:
-            if st.button("🔍 Analyze Coverage", type="primary", use_container_width=True):
-                with st.spinner("🤖 AI agents analyzing policy..."):
+        if policy_dict is not None:
+            # The click callback sets the flag before the rerun, so the run that
+            # performs the analysis draws the button disabled
+            analyzing = st.session_state.get('analyzing', False)
+            st.button("🔍 Analyze Coverage", type="primary", use_container_width=True,
+                      disabled=analyzing, on_click=_start_analysis)
+            
+            # Report a failure from the previous run; the button is enabled again
+            analysis_error = st.session_state.pop('analysis_error', None)
+            if analysis_error is not None:
+                st.error(f"❌ Error: {str(analysis_error)}")
+                st.exception(analysis_error)
+            
+            if analyzing:
+                with st.status("🤖 AI agents analyzing policy...", expanded=True) as status:
                     try:
-                        # Parse policy
-                        policy_input = parse_policy_file(file_content=policy_data)
+                        # Reuse a previous analysis of identical policy data
+                        policy_digest = hashlib.blake2b(policy_data.encode()).hexdigest()
+                        cache_entry = _analysis_cache_entry(policy_digest)
+                        result = cache_entry.get('result')
                         
-                        # Get cached orchestrator
-                        orchestrator = get_orchestrator()
-                        
-                        # Run analysis
-                        result = orchestrator.analyze_policy(policy_input)
+                        if result is None:
+                            from app.utils.policy_parser import parse_policy_file
+                            
+                            # Parse policy
+                            policy_input = parse_policy_file(data=policy_dict)
+                            
+                            # Get cached orchestrator
+                            orchestrator = get_orchestrator()
+                            
+                            # Run analysis, reporting each agent as it finishes
+                            for event in orchestrator.analyze_policy_stream(policy_input):
+                                if isinstance(event, str):
+                                    if event in _AGENT_LABELS:
+                                        status.write(f"{_AGENT_LABELS[event]} finished")
+                                else:
+                                    result = event
+                            
+                            cache_entry['result'] = result
                         
                         # Store in session state
-                        st.session_state['analysis_result'] = {
-                            'policy_number': result.policy_number,
-                            'customer_name': result.customer_name,
-                            'total_gaps_found': result.total_gaps_found,
-                            'coverage_gaps': [
-                                {
-                                    'gap_type': gap.gap_type.value,
-                                    'severity': gap.severity.value,
-                                    'title': gap.title,
-                                    'explanation': gap.explanation,
-                                    'recommendation': gap.recommendation,
-                                    'estimated_annual_premium': gap.estimated_annual_premium,
-                                    'risk_factors': gap.risk_factors
-                                }
-                                for gap in result.coverage_gaps
-                            ],
-                            'total_estimated_premium_impact': result.total_estimated_premium_impact,
-                            'analysis_summary': result.analysis_summary
-                        }
+                        st.session_state['analysis_result'] = result
+                        st.session_state['analysis_aggregates'] = Counter(
+                            gap.severity.value for gap in result.coverage_gaps
+                        )
                         
-                        st.success("✅ Analysis complete!")
-                        st.rerun()
+                        status.update(label="✅ Analysis complete!", state="complete", expanded=False)
                         
                     except Exception as e:
-                        st.error(f"❌ Error: {str(e)}")
-                        st.exception(e)
+                        status.update(label="❌ Analysis failed", state="error")
+                        st.session_state['analysis_error'] = e
+                    finally:
+                        st.session_state['analyzing'] = False
+                
+                # This run drew the button disabled; rerun to redraw it enabled
+                st.rerun()
         else:
-            st.info("📥 Upload a policy file or select a sample to begin")
+            # Drop a pending request if the policy went away before it could run
+            st.session_state['analyzing'] = False
+            if policy_data:
+                st.info("✏️ Fix the policy JSON to analyze")
+            else:
+                st.info("📥 Upload a policy file or select a sample to begin")
     
     # Display results
     if 'analysis_result' in st.session_state:
         result = st.session_state['analysis_result']
+        severity_counts = st.session_state['analysis_aggregates']
         
         st.markdown("---")
         st.header("📊 Analysis Results")
         
         # Summary metrics
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{result['total_gaps_found']}</div>
-                <div class="metric-label">Coverage Gaps</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            high_priority = sum(1 for gap in result['coverage_gaps'] if gap['severity'] == 'High')
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{high_priority}</div>
-                <div class="metric-label">High Priority</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">${result['total_estimated_premium_impact']:,.0f}</div>
-                <div class="metric-label">Annual Premium Impact</div>
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(_METRICS_TEMPLATE.substitute(
+            total_gaps=result.total_gaps_found,
+            high_priority=severity_counts[RiskSeverity.HIGH.value],
+            premium_impact=f"{result.total_estimated_premium_impact:,.0f}",
+        ), unsafe_allow_html=True)
         
         # Analysis summary
-        st.info(f"**Summary:** {result['analysis_summary']}")
+        st.info(f"**Summary:** {result.analysis_summary}")
         
         # Coverage gaps
-        if result['coverage_gaps']:
+        if result.coverage_gaps:
             st.subheader("🎯 Identified Coverage Gaps")
             
-            for gap in result['coverage_gaps']:
-                severity = gap['severity']
-                severity_class = f"severity-{severity.lower()}"
-                gap_class = f"gap-{severity.lower()}"
-                
-                st.markdown(f"""
-                <div class="gap-card {gap_class}">
-                    <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 1rem;">
-                        <h3 style="margin: 0;">{gap['title']}</h3>
-                        <span class="severity-badge {severity_class}">{severity} Risk</span>
-                    </div>
-                    <p><strong>Why this matters:</strong> {gap['explanation']}</p>
-                    <p><strong>Recommendation:</strong> {gap['recommendation']}</p>
-                    {f"<p><strong>Estimated Premium:</strong> ${gap['estimated_annual_premium']:,.2f}/year</p>" if gap['estimated_annual_premium'] else ""}
-                    {f"<p><strong>Risk Factors:</strong> {', '.join(gap['risk_factors'])}</p>" if gap['risk_factors'] else ""}
-                </div>
-                """, unsafe_allow_html=True)
+            gap_cards = [_render_gap_card(gap) for gap in result.coverage_gaps]
+            st.markdown("".join(gap_cards), unsafe_allow_html=True)
         else:
             st.success("✅ No significant coverage gaps identified. Your policy provides adequate protection!")
         
-        # Download report
+        # Download report; only encode it when the user asks for one
         st.markdown("---")
-        st.download_button(
-            label="📥 Download Analysis Report (JSON)",
-            data=json.dumps(result, indent=2),
-            file_name=f"coverage_analysis_{result['policy_number']}.json",
-            mime="application/json"
-        )
+        if st.button("📄 Prepare Analysis Report"):
+            st.download_button(
+                label="📥 Download Analysis Report (JSON)",
+                data=result.model_dump_json(indent=2),
+                file_name=f"coverage_analysis_{result.policy_number}.json",
+                mime="application/json"
+            )
 
 
 if __name__ == "__main__":